@@ -1,6 +1,8 @@
 import logging
 import os
+import pathlib
 import signal
+import sys
 from contextlib import AbstractAsyncContextManager
 from enum import Enum
 from threading import Event
@@ -81,6 +83,17 @@ class CreateBrowser(AbstractAsyncContextManager):
             assert self.browser_pid is None
 
 
+def unstarted_browser(tmp_path: pathlib.Path) -> zd.Browser:
+    """creates a browser object for unit tests, which is never actually started"""
+    # as the browser is never started, any existing file will do as executable
+    return zd.Browser(
+        zd.Config(
+            browser_executable_path=sys.executable,
+            user_data_dir=tmp_path / "profile",
+        )
+    )
+
+
 @pytest.fixture
 def create_browser() -> type[CreateBrowser]:
     return CreateBrowser
@@ -1,8 +1,28 @@
+import asyncio
+import logging
+import os
+import pathlib
+import sys
+import tempfile
+
+import asyncio_atexit
 import pytest
 from pytest_mock import MockerFixture
 
 import zendriver as zd
-from tests.conftest import CreateBrowser
+from tests.conftest import CreateBrowser, unstarted_browser
+from zendriver import cdp
+
+
+def target_info(target_id: str, type_: str = "page") -> cdp.target.TargetInfo:
+    return cdp.target.TargetInfo(
+        target_id=cdp.target.TargetID(target_id),
+        type_=type_,
+        title="",
+        url="about:blank",
+        attached=False,
+        can_access_opener=False,
+    )
 
 
 async def test_connection_error_raises_exception_and_logs_stderr(
@@ -34,3 +54,125 @@ async def test_update_target_sets_target_title(browser: zd.Browser):
     await page.update_target()
     assert page.target
     assert page.target.title == "Example Domain"
+
+
+def test_atexit_cleanup_removes_temporary_profile(
+    tmp_path: pathlib.Path, monkeypatch: pytest.MonkeyPatch
+):
+    # only temporary profiles are removed, so let one be created inside tmp_path
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    user_data_dir = None
+
+    async def main():
+        nonlocal user_data_dir
+        browser = zd.Browser(zd.Config(browser_executable_path=sys.executable))
+        user_data_dir = browser.config.user_data_dir
+        open(os.path.join(user_data_dir, "Local State"), "w").close()
+        asyncio_atexit.register(browser._cleanup_temporary_profile)
+
+    asyncio.run(main())
+
+    assert user_data_dir is not None
+    assert not os.path.exists(user_data_dir)
+
+
+async def test_main_frame_stopped_loading_handler_is_registered_once(
+    tmp_path: pathlib.Path,
+):
+    browser = unstarted_browser(tmp_path)
+    tab = zd.Tab("ws://unused", target=target_info("a"), browser=browser)
+
+    stopped_loading = browser._main_frame_stopped_loading(tab)
+    assert len(tab.handlers[cdp.page.FrameStoppedLoading]) == 1
+
+    (handler,) = tab.handlers[cdp.page.FrameStoppedLoading]
+    assert callable(handler)
+    handler(cdp.page.FrameStoppedLoading(frame_id=cdp.page.FrameId("other")))
+    assert not stopped_loading.is_set()
+    handler(cdp.page.FrameStoppedLoading(frame_id=cdp.page.FrameId("a")))
+    assert stopped_loading.is_set()
+
+    # the same handler is reused and the event is cleared for the next navigation
+    assert browser._main_frame_stopped_loading(tab) is stopped_loading
+    assert not stopped_loading.is_set()
+    assert len(tab.handlers[cdp.page.FrameStoppedLoading]) == 1
+
+    # a new handler is registered if the user removed it
+    tab.remove_handlers()
+    browser._main_frame_stopped_loading(tab)
+    assert len(tab.handlers[cdp.page.FrameStoppedLoading]) == 1
+
+
+async def test_target_updates_invalidate_tabs_and_main_tab(
+    tmp_path: pathlib.Path, mocker: MockerFixture
+):
+    browser = unstarted_browser(tmp_path)
+
+    browser._handle_target_update(cdp.target.TargetCreated(target_info("a", "iframe")))
+    assert browser.tabs == []
+    assert browser.main_tab.target_id == "a"
+
+    browser._handle_target_update(cdp.target.TargetCreated(target_info("b")))
+    assert [t.target_id for t in browser.tabs] == ["b"]
+    assert browser.main_tab.target_id == "b"
+
+    browser._handle_target_update(cdp.target.TargetInfoChanged(target_info("a")))
+    assert [t.target_id for t in browser.tabs] == ["a", "b"]
+    assert browser.main_tab.target_id == "a"
+
+    browser._handle_target_update(
+        cdp.target.TargetDestroyed(target_id=cdp.target.TargetID("a"))
+    )
+    assert [t.target_id for t in browser.tabs] == ["b"]
+    assert browser.main_tab.target_id == "b"
+
+    mocker.patch.object(
+        browser,
+        "_get_targets",
+        return_value=[target_info("b", "iframe"), target_info("c")],
+    )
+    await browser.update_targets()
+    assert [t.target_id for t in browser.tabs] == ["c"]
+    assert browser.main_tab.target_id == "c"
+
+    # modifying the returned list doesn't affect the browser
+    browser.tabs.clear()
+    assert [t.target_id for t in browser.tabs] == ["c"]
+
+
+async def test_target_events_keep_target_index_in_sync(
+    tmp_path: pathlib.Path, mocker: MockerFixture
+):
+    # also exercise the debug logging of target changes
+    mocker.patch.object(
+        zd.core.browser.logger, "getEffectiveLevel", return_value=logging.DEBUG
+    )
+    browser = unstarted_browser(tmp_path)
+
+    def assert_in_sync():
+        assert browser._targets_by_id == {t.target_id: t for t in browser.targets}
+
+    browser._handle_target_update(cdp.target.TargetCreated(target_info("a")))
+    browser._handle_target_update(cdp.target.TargetCreated(target_info("b")))
+    assert [t.target_id for t in browser.targets] == ["a", "b"]
+    assert_in_sync()
+
+    changed = target_info("a")
+    changed.title = "changed"
+    browser._handle_target_update(cdp.target.TargetInfoChanged(changed))
+    assert browser._targets_by_id["a"].target is changed
+    assert_in_sync()
+
+    browser._handle_target_update(
+        cdp.target.TargetDestroyed(target_id=cdp.target.TargetID("a"))
+    )
+    assert [t.target_id for t in browser.targets] == ["b"]
+    assert_in_sync()
+
+    # events for unknown targets are ignored
+    browser._handle_target_update(cdp.target.TargetInfoChanged(target_info("x")))
+    browser._handle_target_update(
+        cdp.target.TargetDestroyed(target_id=cdp.target.TargetID("x"))
+    )
+    assert [t.target_id for t in browser.targets] == ["b"]
+    assert_in_sync()
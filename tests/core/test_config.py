@@ -0,0 +1,33 @@
+import pathlib
+import sys
+
+import zendriver as zd
+
+
+def test_clone_copies_argument_lists(tmp_path: pathlib.Path):
+    extension = tmp_path / "extension"
+    extension.mkdir()
+    config = zd.Config(
+        user_data_dir=tmp_path / "profile",
+        browser_executable_path=sys.executable,
+        browser_args=["--foo=bar"],
+    )
+
+    clone = config.clone()
+    assert clone is not config
+    assert clone._browser_args == config._browser_args
+    assert clone._browser_args is not config._browser_args
+    assert clone._default_browser_args is not config._default_browser_args
+    assert clone._extensions is not config._extensions
+
+    clone.add_argument("--cloned=1")
+    clone._default_browser_args.append("--cloned-default=1")
+    clone.add_extension(extension)
+    clone.port = 1234
+
+    assert config._browser_args == ["--foo=bar"]
+    assert "--cloned-default=1" not in config._default_browser_args
+    assert config._extensions == []
+    assert config.port is None
+    assert "--cloned=1" in clone()
+    assert "--cloned=1" not in config()
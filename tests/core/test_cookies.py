@@ -0,0 +1,68 @@
+import pathlib
+import pickle
+
+from pytest_mock import MockerFixture
+
+from tests.conftest import unstarted_browser
+from zendriver import cdp
+
+
+def cookie(name: str, value: str, domain: str, path: str = "/") -> cdp.network.Cookie:
+    return cdp.network.Cookie(
+        name=name,
+        value=value,
+        domain=domain,
+        path=path,
+        size=len(name) + len(value),
+        http_only=False,
+        secure=False,
+        session=True,
+        priority=cdp.network.CookiePriority.MEDIUM,
+        same_party=False,
+        source_scheme=cdp.network.CookieSourceScheme.SECURE,
+        source_port=443,
+    )
+
+
+async def test_save_only_saves_matching_cookies(
+    mocker: MockerFixture, tmp_path: pathlib.Path
+):
+    browser = unstarted_browser(tmp_path)
+    mocker.patch.object(
+        browser.cookies,
+        "get_all",
+        return_value=[
+            cookie("session", "abc", "example.com"),
+            cookie("tracking", "xyz", "ads.test"),
+        ],
+    )
+
+    file = tmp_path / "cookies.dat"
+    await browser.cookies.save(file, pattern="example")
+
+    with file.open("rb") as f:
+        saved = pickle.load(f)
+    assert [c.name for c in saved] == ["session"]
+
+
+async def test_load_matches_pattern_against_domain_name_and_value(
+    mocker: MockerFixture, tmp_path: pathlib.Path
+):
+    browser = unstarted_browser(tmp_path)
+    file = tmp_path / "cookies.dat"
+    with file.open("wb") as f:
+        pickle.dump(
+            [
+                cookie("by_domain", "1", "match.test"),
+                cookie("match_by_name", "2", "example.com"),
+                cookie("by_value", "match", "example.com"),
+                cookie("by_path", "3", "example.com", path="/match"),
+            ],
+            f,
+        )
+    set_all = mocker.patch.object(browser.cookies, "set_all")
+
+    await browser.cookies.load(file, pattern="match")
+
+    (loaded,) = set_all.call_args.args
+    assert [c.name for c in loaded] == ["by_domain", "match_by_name", "by_value"]
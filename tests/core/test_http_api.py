@@ -0,0 +1,31 @@
+import json
+
+from pytest_mock import MockerFixture
+
+from zendriver.core.browser import HTTPApi
+
+
+def mock_urlopen(mocker: MockerFixture, body: bytes):
+    response = mocker.MagicMock()
+    response.__enter__.return_value.read.return_value = body
+    return mocker.patch("urllib.request.urlopen", return_value=response)
+
+
+async def test_get_keeps_query_string(mocker: MockerFixture):
+    urlopen = mock_urlopen(mocker, b'{"id": "1"}')
+
+    assert await HTTPApi(("127.0.0.1", 9222)).get("new?about:blank") == {"id": "1"}
+
+    request = urlopen.call_args.args[0]
+    assert request.full_url == "http://127.0.0.1:9222/json/new?about:blank"
+    assert request.get_method() == "GET"
+
+
+async def test_post_sends_json_body(mocker: MockerFixture):
+    urlopen = mock_urlopen(mocker, b"{}")
+
+    await HTTPApi(("127.0.0.1", 9222)).post("activate", {"a": 1})
+
+    request = urlopen.call_args.args[0]
+    assert request.get_method() == "POST"
+    assert json.loads(request.data) == {"a": 1}
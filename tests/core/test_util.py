@@ -0,0 +1,43 @@
+import math
+
+import pytest
+
+from zendriver.core import util
+
+
+@pytest.fixture(params=["orjson", "json"])
+def json_backend(request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch):
+    if request.param == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(util, "orjson", None)
+    return request.param
+
+
+def test_json_dumps_returns_str(json_backend: str):
+    message = util._json_dumps({"method": "Page.navigate", "params": {}, "id": 1})
+    assert isinstance(message, str)
+    assert util._json_loads(message) == {
+        "method": "Page.navigate",
+        "params": {},
+        "id": 1,
+    }
+
+
+def test_json_dumps_big_int(json_backend: str):
+    assert util._json_dumps({"a": 2**70}).replace(" ", "") == '{"a":%d}' % 2**70
+
+
+def test_json_loads_accepts_str_and_bytes(json_backend: str):
+    assert util._json_loads('{"a": [1, "b"]}') == {"a": [1, "b"]}
+    assert util._json_loads(b'{"a": [1, "b"]}') == {"a": [1, "b"]}
+
+
+def test_json_loads_non_standard_input(json_backend: str):
+    assert math.isnan(util._json_loads('{"a": NaN}')["a"])
+    assert util._json_loads('{"a": 1e400}')["a"] == math.inf
+
+
+def test_json_loads_invalid_input_raises(json_backend: str):
+    with pytest.raises(ValueError):
+        util._json_loads("{not json")
@@ -1,22 +1,23 @@
 from __future__ import annotations
 
 import asyncio
-import copy
 import http
 import http.cookiejar
-import json
 import logging
+import math
 import pathlib
 import pickle
 import re
 import shutil
+import typing
 import urllib.parse
 import urllib.request
 import warnings
 from collections import defaultdict
-from typing import List, Tuple, Union
+from typing import Callable, List, Tuple, Union
 
 import asyncio_atexit
+import mss
 
 from .. import cdp
 from . import tab, util
@@ -26,6 +27,15 @@ from .connection import Connection
 
 logger = logging.getLogger(__name__)
 
+_UNGRANTABLE_PERMISSIONS = (
+    cdp.browser.PermissionType.FLASH,
+    cdp.browser.PermissionType.CAPTURED_SURFACE_CONTROL,
+)
+_ALL_PERMISSIONS = tuple(
+    p for p in cdp.browser.PermissionType if p not in _UNGRANTABLE_PERMISSIONS
+)
+"""all permission types which are granted by :meth:`Browser.grant_all_permissions`"""
+
 
 class Browser:
     """
@@ -121,10 +131,15 @@ class Browser:
 
         # each instance gets it's own copy so this class gets a copy that it can
         # use to help manage the browser instance data (needed for multiple browsers)
-        self.config = copy.deepcopy(config)
+        self.config = config.clone()
 
         self.targets: List = []
         """current targets (all types)"""
+        self._targets_by_id: dict[str, Connection] = {}
+        self._tabs_cache: List[tab.Tab] | None = None
+        self._main_tab_cache: tab.Tab | None = None
+        self._ws_prefix = ""
+        self._stopped_loading_events: dict[str, tuple[asyncio.Event, Callable]] = {}
         self.info: ContraDict | None = None
         self._target = None
         self._process = None
@@ -143,14 +158,28 @@ class Browser:
     @property
     def main_tab(self) -> tab.Tab:
         """returns the target which was launched with the browser"""
-        return sorted(self.targets, key=lambda x: x.type_ == "page", reverse=True)[0]
+        main_tab = self._main_tab_cache
+        if main_tab is None:
+            targets = self.targets
+            if not targets:
+                raise RuntimeError("Browser not yet started. use await browser.start()")
+            # the page target is usually the first one, so this rarely scans further
+            main_tab = next((t for t in targets if t.type_ == "page"), None)
+            if main_tab is None:
+                main_tab = targets[0]
+            self._main_tab_cache = main_tab
+        return main_tab
 
     @property
     def tabs(self) -> List[tab.Tab]:
         """returns the current targets which are of type "page"
         :return:
         """
-        tabs = filter(lambda item: item.type_ == "page", self.targets)
+        tabs = self._tabs_cache
+        if tabs is None:
+            targets = self.targets
+            tabs = self._tabs_cache = [t for t in targets if t.type_ == "page"]
+        # return a copy, so callers modifying the list don't corrupt the cache
         return list(tabs)
 
     @property
@@ -161,10 +190,8 @@ class Browser:
 
     @property
     def stopped(self):
-        if self._process and self._process.returncode is None:
-            return False
-        return True
-        # return (self._process and self._process.returncode) or False
+        process = self._process
+        return process is None or process.returncode is not None
 
     async def wait(self, time: Union[float, int] = 1) -> Browser:
         """wait for <time> seconds. important to use, especially in between page navigation
@@ -177,6 +204,11 @@ class Browser:
     sleep = wait
     """alias for wait"""
 
+    def _invalidate_target_caches(self):
+        """drops the cached `tabs` and `main_tab` views, to be called whenever targets change"""
+        self._tabs_cache = None
+        self._main_tab_cache = None
+
     def _handle_target_update(
         self,
         event: Union[
@@ -191,14 +223,15 @@ class Browser:
         if isinstance(event, cdp.target.TargetInfoChanged):
             target_info = event.target_info
 
-            current_tab = next(
-                filter(
-                    lambda item: item.target_id == target_info.target_id, self.targets
-                )
-            )
+            current_tab = self._targets_by_id.get(target_info.target_id)
+            if current_tab is None:
+                return
             current_target = current_tab.target
+            if current_target is None or current_target.type_ != target_info.type_:
+                self._invalidate_target_caches()
 
-            if logger.getEffectiveLevel() <= 10:
+            # only compute the diff when it is actually logged
+            if current_target is not None and logger.getEffectiveLevel() <= 10:
                 changes = util.compare_target_info(current_target, target_info)
                 changes_string = ""
                 for change in changes:
@@ -209,35 +242,36 @@ class Browser:
                     % (self.targets.index(current_tab), changes_string)
                 )
 
-                current_tab.target = target_info
+            current_tab.target = target_info
 
         elif isinstance(event, cdp.target.TargetCreated):
             target_info = event.target_info
             from .tab import Tab
 
             new_target = Tab(
-                (
-                    f"ws://{self.config.host}:{self.config.port}"
-                    f"/devtools/{target_info.type_ or 'page'}"  # all types are 'page' internally in chrome apparently
-                    f"/{target_info.target_id}"
-                ),
+                # all types are 'page' internally in chrome apparently
+                f"{self._ws_prefix}{target_info.type_ or 'page'}/{target_info.target_id}",
                 target=target_info,
                 browser=self,
             )
 
             self.targets.append(new_target)
+            self._targets_by_id[target_info.target_id] = new_target
+            self._invalidate_target_caches()
 
             logger.debug("target #%d created => %s", len(self.targets), new_target)
 
         elif isinstance(event, cdp.target.TargetDestroyed):
-            current_tab = next(
-                filter(lambda item: item.target_id == event.target_id, self.targets)
-            )
+            current_tab = self._targets_by_id.pop(event.target_id, None)
+            self._stopped_loading_events.pop(event.target_id, None)
+            if current_tab is None:
+                return
             logger.debug(
                 "target removed. id # %d => %s"
                 % (self.targets.index(current_tab), current_tab)
             )
             self.targets.remove(current_tab)
+            self._invalidate_target_caches()
 
     async def get(
         self, url="about:blank", new_tab: bool = False, new_window: bool = False
@@ -264,24 +298,65 @@ class Browser:
                 )
             )
             # get the connection matching the new target_id from our inventory
-            connection: tab.Tab = next(
-                filter(
-                    lambda item: item.type_ == "page" and item.target_id == target_id,
-                    self.targets,
-                )
-            )
+            connection = typing.cast(tab.Tab, self._targets_by_id[target_id])
             connection.browser = self
+            # the new tab starts loading before any handler could be registered on
+            # it, so there is no load event to wait for here
 
         else:
             # first tab from browser.tabs
             connection = next(filter(lambda item: item.type_ == "page", self.targets))
+            connection.browser = self
+
+            stopped_loading = self._main_frame_stopped_loading(connection)
             # use the tab to navigate to new url
             await connection.send(cdp.page.navigate(url))
-            connection.browser = self
+            await self._wait_loaded(stopped_loading)
 
-        await connection.sleep(0.25)
+        await connection.update_target()
         return connection
 
+    def _main_frame_stopped_loading(self, connection: tab.Tab) -> asyncio.Event:
+        """
+        returns a cleared event which is set when the main frame of the tab stops loading.
+
+        note: the handler setting the event stays registered on the tab, which keeps the
+        Page domain of the tab enabled. this way the domain is enabled once per tab,
+        instead of being enabled again on every call to :meth:`get`.
+        """
+        target_id = connection.target_id
+        stopped_loading, handler = self._stopped_loading_events.get(
+            target_id, (None, None)
+        )
+        if stopped_loading is None or handler not in connection.handlers.get(
+            cdp.page.FrameStoppedLoading, []
+        ):
+            event = stopped_loading = asyncio.Event()
+
+            def on_frame_stopped_loading(e: cdp.page.FrameStoppedLoading):
+                # the main frame of a page shares its id with the target
+                if e.frame_id == target_id:
+                    event.set()
+
+            connection.add_handler(
+                cdp.page.FrameStoppedLoading, on_frame_stopped_loading
+            )
+            self._stopped_loading_events[target_id] = (
+                stopped_loading,
+                on_frame_stopped_loading,
+            )
+
+        stopped_loading.clear()
+        return stopped_loading
+
+    @staticmethod
+    async def _wait_loaded(stopped_loading: asyncio.Event) -> None:
+        # wait at most as long as get() used to sleep unconditionally
+        try:
+            await asyncio.wait_for(stopped_loading.wait(), timeout=0.25)
+        except asyncio.TimeoutError:
+            pass
+
     async def start(self) -> Browser:
         """launches the actual browser"""
         if not self:
@@ -302,6 +377,9 @@ class Browser:
             self.config.host = "127.0.0.1"
             self.config.port = util.free_port()
 
+        # prefix of the websocket urls of all targets, used when targets are discovered
+        self._ws_prefix = f"ws://{self.config.host}:{self.config.port}/devtools/"
+
         if not connect_existing:
             logger.debug(
                 "BROWSER EXECUTABLE PATH: %s", self.config.browser_executable_path
@@ -353,12 +431,22 @@ class Browser:
 
         self._http = HTTPApi((self.config.host, self.config.port))
         util.get_registered_instances().add(self)
-        await asyncio.sleep(self.config.browser_connection_timeout)
-        for _ in range(self.config.browser_connection_max_tries):
-            if await self.test_connection():
+        # poll with exponential backoff so a quickly starting browser isn't kept
+        # waiting, capping each delay at browser_connection_timeout. slow starting
+        # browsers still get the full time budget of the initial wait plus
+        # browser_connection_max_tries waits of browser_connection_timeout.
+        loop = asyncio.get_running_loop()
+        timeout = self.config.browser_connection_timeout
+        deadline = (
+            loop.time() + (self.config.browser_connection_max_tries + 1) * timeout
+        )
+        delay = 0.01
+        while not await self.test_connection():
+            remaining = deadline - loop.time()
+            if remaining <= 0:
                 break
-
-            await asyncio.sleep(self.config.browser_connection_timeout)
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 2, timeout)
 
         if not self.info:
             if self._process is not None:
@@ -458,16 +546,11 @@ class Browser:
         if not self.connection:
             raise RuntimeError("Browser not yet started. use await browser.start()")
 
-        permissions = list(cdp.browser.PermissionType)
-        permissions.remove(cdp.browser.PermissionType.FLASH)
-        permissions.remove(cdp.browser.PermissionType.CAPTURED_SURFACE_CONTROL)
-        await self.connection.send(cdp.browser.grant_permissions(permissions))
+        await self.connection.send(
+            cdp.browser.grant_permissions(list(_ALL_PERMISSIONS))
+        )
 
     async def tile_windows(self, windows=None, max_columns: int = 0):
-        import math
-
-        import mss
-
         m = mss.mss()
         screen, screen_width, screen_height = 3 * (None,)
         if m.monitors and len(m.monitors) >= 1:
@@ -484,8 +567,8 @@ class Browser:
             tabs = windows
         else:
             tabs = self.tabs
-        for tab_ in tabs:
-            window_id, bounds = await tab_.get_window()
+        windows_info = await asyncio.gather(*(tab_.get_window() for tab_ in tabs))
+        for tab_, (window_id, bounds) in zip(tabs, windows_info):
             distinct_windows[window_id].append(tab_)
 
         num_windows = len(distinct_windows)
@@ -500,6 +583,7 @@ class Browser:
 
         distinct_windows_iter = iter(distinct_windows.values())
         grid = []
+        assignments = []
         for x in range(req_cols):
             for y in range(req_rows):
                 try:
@@ -508,17 +592,18 @@ class Browser:
                     continue
                 if not tabs:
                     continue
-                tab_ = tabs[0]
-
-                try:
-                    pos = [x * box_w, y * box_h, box_w, box_h]
-                    grid.append(pos)
-                    await tab_.set_window_size(*pos)
-                except Exception:
-                    logger.info(
-                        "could not set window size. exception => ", exc_info=True
-                    )
-                    continue
+                pos = [x * box_w, y * box_h, box_w, box_h]
+                grid.append(pos)
+                assignments.append((tabs[0], pos))
+
+        # the windows are independent, so resize them all concurrently
+        results = await asyncio.gather(
+            *(tab_.set_window_size(*pos) for tab_, pos in assignments),
+            return_exceptions=True,
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.info("could not set window size. exception => ", exc_info=result)
         return grid
 
     async def _get_targets(self) -> List[cdp.target.TargetInfo]:
@@ -530,26 +615,18 @@ class Browser:
     async def update_targets(self):
         targets: List[cdp.target.TargetInfo]
         targets = await self._get_targets()
+        prefix = self._ws_prefix + "page/"  # all types are 'page' somehow
+        new_targets = []
         for t in targets:
-            for existing_tab in self.targets:
-                existing_target = existing_tab.target
-                if existing_target.target_id == t.target_id:
-                    existing_tab.target.__dict__.update(t.__dict__)
-                    break
-            else:
-                self.targets.append(
-                    Connection(
-                        (
-                            f"ws://{self.config.host}:{self.config.port}"
-                            f"/devtools/page"  # all types are 'page' somehow
-                            f"/{t.target_id}"
-                        ),
-                        target=t,
-                        _owner=self,
-                    )
-                )
-
-        await asyncio.sleep(0)
+            existing_tab = self._targets_by_id.get(t.target_id)
+            if existing_tab is not None:
+                existing_tab.target.__dict__.update(t.__dict__)
+                continue
+            new_target = Connection(prefix + t.target_id, target=t, _owner=self)
+            new_targets.append(new_target)
+            self._targets_by_id[t.target_id] = new_target
+        self.targets.extend(new_targets)
+        self._invalidate_target_caches()
 
     async def __aenter__(self):
         return self
@@ -621,10 +698,11 @@ class Browser:
 
         for attempt in range(5):
             try:
-                shutil.rmtree(self.config.user_data_dir, ignore_errors=False)
+                await self._remove_user_data_dir()
                 logger.debug(
                     "successfully removed temp profile %s" % self.config.user_data_dir
                 )
+                break
             except FileNotFoundError:
                 break
             except (PermissionError, OSError) as e:
@@ -637,6 +715,17 @@ class Browser:
                 await asyncio.sleep(0.15)
                 continue
 
+    async def _remove_user_data_dir(self) -> None:
+        try:
+            # profiles can contain a lot of files, so don't block the event loop
+            await asyncio.to_thread(
+                shutil.rmtree, self.config.user_data_dir, ignore_errors=False
+            )
+        except RuntimeError:
+            # when called from asyncio_atexit, asyncio.run() has already shut down
+            # the default executor, so remove the profile on the loop itself
+            shutil.rmtree(self.config.user_data_dir, ignore_errors=False)
+
     def __del__(self):
         pass
 
@@ -646,6 +735,16 @@ class CookieJar:
         self._browser = browser
         # self._connection = connection
 
+    def _pick_connection(self) -> Connection:
+        """returns the first open page connection, or the browser connection if there is none"""
+        for target in self._browser.targets:
+            if target.type_ == "page" and not target.closed:
+                return target
+        connection = self._browser.connection
+        if not connection:
+            raise RuntimeError("Browser not yet started. use await browser.start()")
+        return connection
+
     async def get_all(
         self, requests_cookie_format: bool = False
     ) -> list[cdp.network.Cookie] | list[http.cookiejar.Cookie]:
@@ -658,16 +757,7 @@ class CookieJar:
         :rtype:
 
         """
-        connection: Connection | None = None
-        for tab_ in self._browser.tabs:
-            if tab_.closed:
-                continue
-            connection = tab_
-            break
-        else:
-            connection = self._browser.connection
-        if not connection:
-            raise RuntimeError("Browser not yet started. use await browser.start()")
+        connection = self._pick_connection()
 
         cookies = await connection.send(cdp.storage.get_cookies())
         if requests_cookie_format:
@@ -695,16 +785,7 @@ class CookieJar:
         :return:
         :rtype:
         """
-        connection: Connection | None = None
-        for tab_ in self._browser.tabs:
-            if tab_.closed:
-                continue
-            connection = tab_
-            break
-        else:
-            connection = self._browser.connection
-        if not connection:
-            raise RuntimeError("Browser not yet started. use await browser.start()")
+        connection = self._pick_connection()
 
         await connection.send(cdp.storage.set_cookies(cookies))
 
@@ -728,30 +809,13 @@ class CookieJar:
         """
         compiled_pattern = re.compile(pattern)
         save_path = pathlib.Path(file).resolve()
-        connection: Connection | None = None
-        for tab_ in self._browser.tabs:
-            if tab_.closed:
-                continue
-            connection = tab_
-            break
-        else:
-            connection = self._browser.connection
-        if not connection:
-            raise RuntimeError("Browser not yet started. use await browser.start()")
-
-        cookies: (
-            list[cdp.network.Cookie] | list[http.cookiejar.Cookie]
-        ) = await connection.send(cdp.storage.get_cookies())
-        # if not connection:
-        #     return
-        # if not connection.websocket:
-        #     return
-        # if connection.websocket.closed:
-        #     return
         cookies = await self.get_all(requests_cookie_format=False)
         included_cookies = []
         for cookie in cookies:
-            for match in compiled_pattern.finditer(str(cookie.__dict__)):
+            if any(
+                compiled_pattern.search(field)
+                for field in (cookie.domain, cookie.name, str(cookie.value))
+            ):
                 logger.debug(
                     "saved cookie for matching pattern '%s' => (%s: %s)",
                     compiled_pattern.pattern,
@@ -759,8 +823,8 @@ class CookieJar:
                     cookie.value,
                 )
                 included_cookies.append(cookie)
-                break
-        pickle.dump(cookies, save_path.open("w+b"))
+        with save_path.open("w+b") as f:
+            pickle.dump(included_cookies, f, protocol=pickle.HIGHEST_PROTOCOL)
 
     async def load(self, file: PathLike = ".session.dat", pattern: str = ".*"):
         """
@@ -780,14 +844,15 @@ class CookieJar:
         :return:
         :rtype:
         """
-        import re
-
         compiled_pattern = re.compile(pattern)
         save_path = pathlib.Path(file).resolve()
         cookies = pickle.load(save_path.open("r+b"))
         included_cookies = []
         for cookie in cookies:
-            for match in compiled_pattern.finditer(str(cookie.__dict__)):
+            if any(
+                compiled_pattern.search(field)
+                for field in (cookie.domain, cookie.name, str(cookie.value))
+            ):
                 included_cookies.append(cookie)
                 logger.debug(
                     "loaded cookie for matching pattern '%s' => (%s: %s)",
@@ -795,7 +860,6 @@ class CookieJar:
                     cookie.name,
                     cookie.value,
                 )
-                break
         await self.set_all(included_cookies)
 
     async def clear(self):
@@ -807,21 +871,21 @@ class CookieJar:
         :return:
         :rtype:
         """
-        connection: Connection | None = None
-        for tab_ in self._browser.tabs:
-            if tab_.closed:
-                continue
-            connection = tab_
-            break
-        else:
-            connection = self._browser.connection
-        if not connection:
-            raise RuntimeError("Browser not yet started. use await browser.start()")
+        connection = self._pick_connection()
 
         await connection.send(cdp.storage.clear_cookies())
 
 
 class HTTPApi:
+    """
+    minimal client for the devtools http endpoints (/json/...) of a single browser.
+
+    note: these endpoints are only used for a handful of requests while starting the browser,
+    all other traffic goes over the websocket :class:`Connection` of the browser and of each target,
+    which is opened once and reused for every command sent to that target.
+    as every browser listens on its own port, there is no connection pool shared between browsers.
+    """
+
     def __init__(self, addr: Tuple[str, int]):
         self.host, self.port = addr
         self.api = "http://%s:%d" % (self.host, self.port)
@@ -830,7 +894,7 @@ class HTTPApi:
         return await self._request(endpoint)
 
     async def post(self, endpoint, data):
-        return await self._request(endpoint, data)
+        return await self._request(endpoint, "post", data)
 
     async def _request(self, endpoint, method: str = "get", data: dict | None = None):
         url = urllib.parse.urljoin(
@@ -840,13 +904,12 @@ class HTTPApi:
             raise ValueError("get requests cannot contain data")
         if not url:
             url = self.api + endpoint
-        request = urllib.request.Request(url)
-        request.method = method
-        request.data = None
+        request = urllib.request.Request(url, method=method.upper())
         if data:
-            request.data = json.dumps(data).encode("utf-8")
+            request.data = util._json_dumps(data).encode("utf-8")
 
-        response = await asyncio.get_running_loop().run_in_executor(
-            None, lambda: urllib.request.urlopen(request, timeout=10)
-        )
-        return json.loads(response.read())
+        def fetch() -> bytes:
+            with urllib.request.urlopen(request, timeout=10) as response:
+                return response.read()
+
+        return util._json_loads(await asyncio.to_thread(fetch))
@@ -1,3 +1,4 @@
+import copy
 import ctypes
 import logging
 import os
@@ -192,6 +193,22 @@ class Config:
                 path = item.parent
             self._extensions.append(path)
 
+    def clone(self) -> "Config":
+        """
+        returns a copy of this config which can be modified independently.
+
+        this is a shallow copy, except for the argument and extension lists, which
+        are copied so that arguments added to the clone don't leak into the original.
+
+        :return: the copied config
+        :rtype: Config
+        """
+        clone = copy.copy(self)
+        clone._browser_args = list(self._browser_args)
+        clone._default_browser_args = list(self._default_browser_args)
+        clone._extensions = list(self._extensions)
+        return clone
+
     # def __getattr__(self, item):
     #     if item not in self.__dict__:
 
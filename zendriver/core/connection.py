@@ -4,7 +4,6 @@ import asyncio
 import collections
 import inspect
 import itertools
-import json
 import logging
 import sys
 import types
@@ -94,7 +93,9 @@ class Transaction(asyncio.Future):
 
     @property
     def message(self):
-        return json.dumps({"method": self.method, "params": self.params, "id": self.id})
+        return util._json_dumps(
+            {"method": self.method, "params": self.params, "id": self.id}
+        )
 
     @property
     def has_exception(self):
@@ -672,7 +673,7 @@ class Listener:
             # since we are at this point, we are not "idle" anymore.
             self.idle.clear()
 
-            message = json.loads(msg)
+            message = util._json_loads(msg)
             if "id" in message:
                 # response to our command
                 if message["id"] in self.connection.mapper:
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
 import types
 import typing
@@ -8,6 +9,11 @@ from typing import Any, Callable, List, Optional, Set, Union
 
 from deprecated import deprecated
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 import zendriver
 
 from .element import Element
@@ -344,3 +350,34 @@ async def _read_process_stderr(
     except asyncio.TimeoutError:
         logger.debug("Timeout reading process stderr")
         return ""
+
+
+def _json_dumps(obj: Any) -> str:
+    """
+    Serialize an object to a json string, using orjson when it is installed.
+
+    note: orjson writes NaN and infinity as null, where json writes them as
+    NaN/Infinity, which isn't valid json and is rejected by chrome anyway.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj).decode("utf-8")
+        except TypeError:
+            # orjson is stricter than json (e.g. integers above 64 bit)
+            pass
+    return json.dumps(obj)
+
+
+def _json_loads(data: str | bytes) -> Any:
+    """
+    Deserialize a json string, using orjson when it is installed.
+
+    note: like in javascript, orjson parses integers above 64 bit as floats.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # json accepts some input orjson rejects (e.g. NaN or 1e400)
+            pass
+    return json.loads(data)